@@ -4,12 +4,16 @@ Agent Ultimate d'Analyse Bitcointalk - Scan technique complet des nouvelles cryp
 """
 
 import requests
-import ollama
 import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from selectolax.lexbor import LexborHTMLParser
 import re
+import math
+import html as html_lib
 import json
+import orjson
+import functools
+import hashlib
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import logging
@@ -17,7 +21,6 @@ import sqlite3
 import time
 import urllib.parse
 from pathlib import Path
-import pandas as pd
 from dataclasses import dataclass
 import httpx
 
@@ -32,6 +35,169 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Expressions régulières réutilisées
+TOPIC_RE = re.compile(r'topic=(\d+)')
+TOPIC_MSG_RE = re.compile(r'topic=\d+\.msg\d+')
+# Liens "new" des pages de liste, extraits directement des octets bruts: balise <a>
+# portant exactement la classe "new" (vérifiée par lookahead, donc avant ou après href)
+LISTING_RE = re.compile(
+    rb'<a(?=\s)(?=[^>]*?\sclass="(?:[^"]*\s)?new(?:\s[^"]*)?")'
+    rb'[^>]*?\shref="([^"]*topic=(\d+)\.msg\d+[^"]*)"'
+)
+AUTHOR_ID_RE = re.compile(r'author_')
+PREMINE_RE = re.compile(r'([\d.,]+)\s*%')
+
+# Seules ces balises sont construites lors du parsing d'une annonce
+ANNOUNCEMENT_STRAINER = SoupStrainer(['title', 'span', 'div'])
+
+# Patterns pour identifier les types de liens (par ordre de priorité)
+GITHUB_PAT = r'github\.com/[\w.-]+/[\w.-]+'
+WP_PAT = r'whitepaper|white ?paper|litepaper|technical paper'
+# Variante sans espace de WP_PAT: une URL ne contient jamais d'espace, et un pattern
+# avec espace laisserait la lookahead de LINKS_RE déborder au-delà de la fin de l'URL
+WP_URL_PAT = r'whitepaper|litepaper'
+HOST_PAT = r'https?://[a-z0-9.-]+\.[a-z]{2,}'
+
+# Extraction et classification des liens en un seul balayage du texte:
+# chaque alternative vérifie (sans sortir de l'URL) un pattern puis capture l'URL,
+# la première alternative qui correspond donne la catégorie
+_URL_CHARS = r'[^\s<>"]'
+_URL_PAT = rf'(?:https?://{_URL_CHARS}+|www\.{_URL_CHARS}+)'
+LINKS_RE = re.compile(
+    rf'(?=https?://|www\.)(?:'
+    rf'(?={_URL_CHARS}*?(?:{GITHUB_PAT}))(?P<github>{_URL_PAT})'
+    rf'|(?={_URL_CHARS}*?(?:{WP_URL_PAT}))(?P<whitepaper>{_URL_PAT})'
+    rf'|(?={_URL_CHARS}*?{HOST_PAT})(?P<website>{_URL_PAT})'
+    rf'|(?P<other>{_URL_PAT}))',
+    re.IGNORECASE
+)
+
+# Colonnes et requête d'insertion des projets (écritures groupées)
+PROJECT_COLUMNS = (
+    'topic_id', 'title', 'author', 'post_date', 'content', 'technical_score',
+    'innovation_score', 'disruptiveness_score', 'credibility_score', 'risk_score',
+    'premine_percentage', 'is_fork', 'fork_base', 'mining_algorithm', 'consensus_mechanism',
+    'unique_features', 'red_flags', 'strengths', 'final_score', 'github_link',
+    'whitepaper_link', 'website_link', 'analysis_date', 'last_updated', 'is_promising'
+)
+INSERT_SQL = (
+    f"INSERT OR REPLACE INTO projects ({', '.join(PROJECT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(PROJECT_COLUMNS))})"
+)
+
+# Pondérations du score final
+SCORE_WEIGHTS = {
+    'innovation': 0.35,
+    'technical': 0.30,
+    'disruptiveness': 0.25,
+    'bonuses': 0.10
+}
+
+# Taille du contenu envoyé au LLM (sert aussi de clé au cache d'analyses)
+LLM_CONTENT_WINDOW = 3000
+
+# Taille maximale conservée du texte d'une annonce (au-delà, ni stockée ni analysée)
+POST_CONTENT_LIMIT = 4096
+
+# Nombre maximal d'accolades testées pour trouver le JSON dans la réponse du LLM
+JSON_SCAN_ATTEMPTS = 10
+
+_json_decoder = json.JSONDecoder()
+
+def dumps_json(value) -> str:
+    """Encode en JSON avec orjson, repli sur json pour ce qu'orjson refuse (entiers > 64 bits)"""
+    try:
+        return orjson.dumps(value).decode()
+    except TypeError:
+        return json.dumps(value, ensure_ascii=False, default=str)
+
+# Attente maximale (secondes) acceptée depuis un en-tête Retry-After
+MAX_RETRY_DELAY = 60.0
+
+# Serveur Ollama local (API HTTP) et regroupement des annonces par requête
+OLLAMA_CHAT_URL = "http://localhost:11434/api/chat"
+OLLAMA_MODEL = "llama3.1"
+
+# Dimensionnement du contexte Ollama (num_ctx) pour éviter la troncature silencieuse
+# du prompt: estimation prudente des tokens du prompt et de la réponse attendue
+LLM_CHARS_PER_TOKEN = 3
+LLM_RESPONSE_TOKENS_PER_POST = 512
+LLM_MIN_NUM_CTX = 4096
+
+def llm_num_ctx(prompt: str, posts: int) -> int:
+    """Taille de contexte suffisante pour le prompt et les `posts` analyses attendues"""
+    needed = len(prompt) // LLM_CHARS_PER_TOKEN + posts * LLM_RESPONSE_TOKENS_PER_POST
+    # Arrondi au multiple de 1024 supérieur
+    return max(LLM_MIN_NUM_CTX, -(-needed // 1024) * 1024)
+
+def validate_analysis(analysis) -> Dict:
+    """Nettoie une analyse LLM et borne ses scores entre 0 et 100"""
+    if not isinstance(analysis, dict):
+        return {}
+    
+    for score_key in ['innovation_score', 'disruptiveness_score', 'technical_score']:
+        if score_key in analysis:
+            analysis[score_key] = max(0, min(100, int(analysis[score_key])))
+    
+    # Champs stockés tels quels en base: ramenés à des scalaires que sqlite3 sait lier
+    for text_key in ['premine_analysis', 'fork_base', 'mining_algorithm', 'consensus_mechanism']:
+        value = analysis.get(text_key)
+        if isinstance(value, (list, tuple)):
+            analysis[text_key] = ", ".join(str(item) for item in value)
+        elif value is not None and not isinstance(value, str):
+            analysis[text_key] = str(value)
+    
+    if 'is_fork' in analysis and not isinstance(analysis['is_fork'], bool):
+        is_fork = analysis['is_fork']
+        if isinstance(is_fork, str):
+            analysis['is_fork'] = is_fork.strip().lower() in ('true', 'oui', 'yes', '1')
+        else:
+            analysis['is_fork'] = bool(is_fork)
+    
+    return analysis
+
+def parse_premine_percentage(premine_analysis) -> float:
+    """Extrait le pourcentage de premine de l'estimation renvoyée par le LLM"""
+    match = PREMINE_RE.search(str(premine_analysis or ''))
+    if not match:
+        return 0.0
+    
+    # Le prompt est en français: la virgule décimale est acceptée ("1,5%")
+    try:
+        return float(match.group(1).replace(',', '.'))
+    except ValueError:
+        return 0.0
+
+@functools.lru_cache(maxsize=1024)
+def parse_analyses(result_text: str) -> Tuple[Dict, ...]:
+    """Extrait et valide les analyses JSON renvoyées par le LLM pour un lot d'annonces"""
+    # Décodage du premier objet JSON valide, en un seul passage linéaire
+    result = None
+    idx = result_text.find('{')
+    for _ in range(JSON_SCAN_ATTEMPTS):
+        if idx < 0:
+            break
+        try:
+            result, _end = _json_decoder.raw_decode(result_text, idx)
+            break
+        except ValueError:
+            idx = result_text.find('{', idx + 1)
+    
+    if not isinstance(result, dict):
+        return ()
+    
+    analyses = result.get('analyses', [result])
+    if not isinstance(analyses, list):
+        return ()
+    
+    parsed = []
+    for analysis in analyses:
+        try:
+            parsed.append(validate_analysis(analysis))
+        except (TypeError, ValueError, OverflowError):
+            parsed.append({})
+    return tuple(parsed)
+
 @dataclass
 class CryptoProject:
     topic_id: int
@@ -58,19 +224,84 @@ class CryptoProject:
     final_score: int = 0
     analysis_date: str = ""
 
+def project_to_tuple(project: CryptoProject, last_updated: str) -> tuple:
+    """Convertit un projet en ligne pour INSERT_SQL (listes encodées en JSON)"""
+    return (
+        project.topic_id, project.title, project.author, project.post_date,
+        project.content, project.technical_score, project.innovation_score,
+        project.disruptiveness_score, project.credibility_score, project.risk_score,
+        project.premine_percentage, project.is_fork, project.fork_base,
+        project.mining_algorithm, project.consensus_mechanism,
+        dumps_json(project.unique_features), dumps_json(project.red_flags),
+        dumps_json(project.strengths), project.final_score, project.github_link,
+        project.whitepaper_link, project.website_link, project.analysis_date,
+        last_updated, project.final_score >= 75
+    )
+
+class AsyncLimiter:
+    """Limiteur de débit simple: au plus `rate` acquisitions par fenêtre de `per` secondes"""
+
+    def __init__(self, rate: int = 1, per: float = 1.0):
+        self.interval = per / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Attend le prochain créneau disponible"""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            wait_time = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
 class UltimateBitcointalkAnalyzer:
-    def __init__(self, db_path: str = "crypto_analysis.db"):
+    def __init__(self, db_path: str = "crypto_analysis.db", max_concurrency: int = 8,
+                 batch_size: int = 50, flush_interval: float = 2.0,
+                 llm_max_batch: int = 4, llm_max_delay: float = 1.0):
         self.base_url = "https://bitcointalk.org"
-        self.session = None
+        self.client = None
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._limiter = AsyncLimiter(rate=1, per=1.0)
         self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
         self.scraped_count = 0
         self.analyzed_count = 0
+        self._pending_projects = []
+        self._pending_cache = {}
+        self._write_q = None
+        self._writer_task = None
+        self.llm_max_batch = llm_max_batch
+        self.llm_max_delay = llm_max_delay
+        # Contexte fixe, dimensionné pour le plus gros lot possible: un num_ctx variable
+        # obligerait Ollama à recharger le modèle à chaque changement de taille de lot
+        self.llm_num_ctx = llm_num_ctx(
+            self.build_batch_prompt(['x' * LLM_CONTENT_WINDOW] * llm_max_batch), llm_max_batch
+        )
+        self.llm_client = None
+        self._llm_q = None
+        self._batcher_task = None
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
         self.init_database()
+        self._analyzed_ids = {
+            row[0] for row in self._conn.execute("SELECT topic_id FROM projects")
+        }
+        # Cache LLM chargé une fois en mémoire: aucune lecture SQLite depuis la boucle asyncio
+        self._llm_cache = dict(
+            self._conn.execute("SELECT content_hash, analysis_json FROM llm_cache")
+        )
         
     def init_database(self):
         """Initialise la base de données SQLite complète"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conn.cursor()
+        
+        # Réglages de performance (WAL, écritures groupées)
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-65536")
         
         # Table principale des projets
         cursor.execute('''
@@ -116,40 +347,68 @@ class UltimateBitcointalkAnalyzer:
         )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Cache des analyses LLM, indexé par le hash du contenu analysé
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            content_hash TEXT PRIMARY KEY,
+            analysis_json TEXT
+        )
+        ''')
+        
         logger.info("Base de données initialisée")
 
     async def init_session(self):
-        """Initialise la session HTTP asynchrone"""
-        self.session = aiohttp.ClientSession(headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-        })
+        """Initialise (une seule fois) le client HTTP/2 asynchrone partagé"""
+        if self.client and not self.client.is_closed:
+            return
+        self.client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Encoding': 'gzip, deflate, br'
+            }
+        )
 
     async def close_session(self):
-        """Ferme la session HTTP"""
-        if self.session:
-            await self.session.close()
+        """Ferme le client HTTP"""
+        if self.client:
+            await self.client.aclose()
+            self.client = None
 
-    async def fetch_with_retry(self, url: str, retries: int = 3) -> Optional[str]:
-        """Récupère une page avec mécanisme de retry"""
+    async def fetch_bytes(self, url: str, retries: int = 3) -> Optional[bytes]:
+        """Récupère le contenu brut d'une page avec mécanisme de retry"""
         for attempt in range(retries):
             try:
-                async with self.session.get(url, timeout=30) as response:
-                    if response.status == 200:
-                        return await response.text()
-                    elif response.status == 429:
-                        wait_time = 2 ** attempt
-                        logger.warning(f"Rate limit hit, waiting {wait_time}s")
-                        await asyncio.sleep(wait_time)
-                    else:
-                        logger.warning(f"HTTP {response.status} for {url}")
+                response = await self.client.get(url)
+                response.raise_for_status()
+                return response.content
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 429:
+                    wait_time = self.retry_delay(e.response, attempt)
+                    logger.warning(f"Rate limit hit, waiting {wait_time}s")
+                    await asyncio.sleep(wait_time)
+                else:
+                    logger.warning(f"HTTP {e.response.status_code} for {url}")
             except Exception as e:
                 logger.error(f"Attempt {attempt + 1} failed: {e}")
                 await asyncio.sleep(1)
         return None
 
+    @staticmethod
+    def retry_delay(response: httpx.Response, attempt: int) -> float:
+        """Délai avant nouvel essai: en-tête Retry-After (plafonné), sinon backoff exponentiel"""
+        try:
+            delay = float(response.headers.get('Retry-After', ''))
+        except ValueError:
+            return 2 ** attempt
+        if not math.isfinite(delay) or delay < 0:
+            return 2 ** attempt
+        return min(delay, MAX_RETRY_DELAY)
+
     def extract_links(self, text: str) -> Dict[str, str]:
         """Extrait tous les liens importants du contenu"""
         links = {
@@ -159,33 +418,99 @@ class UltimateBitcointalkAnalyzer:
             'other': []
         }
         
-        # Patterns pour identifier les types de liens
-        patterns = {
-            'github': r'github\.com/[a-zA-Z0-9_-]+/[a-zA-Z0-9_-]+',
-            'whitepaper': r'(whitepaper|white paper|litepaper|technical paper)',
-            'website': r'https?://[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        }
-        
-        # Extraction des URLs
-        url_pattern = r'https?://[^\s<>"]+|www\.[^\s<>"]+'
-        found_urls = re.findall(url_pattern, text, re.IGNORECASE)
-        
-        for url in found_urls:
-            if re.search(patterns['github'], url, re.IGNORECASE):
-                links['github'].append(url)
-            elif re.search(patterns['whitepaper'], url, re.IGNORECASE):
-                links['whitepaper'].append(url)
-            elif re.search(patterns['website'], url, re.IGNORECASE):
-                links['website'].append(url)
-            else:
-                links['other'].append(url)
+        for match in LINKS_RE.finditer(text):
+            links[match.lastgroup].append(match.group(match.lastgroup))
                 
         return links
 
+    def get_cached_analysis(self, content_hash: str) -> Optional[Dict]:
+        """Retourne l'analyse LLM en cache pour ce contenu, si elle existe"""
+        analysis_json = self._llm_cache.get(content_hash)
+        if analysis_json is None:
+            return None
+        return validate_analysis(orjson.loads(analysis_json))
+
     async def analyze_technical_depth(self, content: str) -> Dict:
-        """Analyse technique approfondie avec Ollama"""
-        prompt = f"""
-        Analyse technique COMPLÈTE de cette annonce de cryptomonnaie:
+        """Analyse technique approfondie avec Ollama (résultats mis en cache)"""
+        excerpt = content[:LLM_CONTENT_WINDOW]
+        content_hash = hashlib.blake2b(excerpt.encode(), digest_size=16).hexdigest()
+        
+        cached = self.get_cached_analysis(content_hash)
+        if cached is not None:
+            logger.info(f"Analyse LLM trouvée en cache ({content_hash})")
+            return cached
+        
+        # Regroupement avec d'autres annonces par la tâche de batching
+        future = asyncio.get_running_loop().create_future()
+        await self._llm_q.put((excerpt, future))
+        analysis = await future
+        
+        if analysis:
+            try:
+                analysis_json = dumps_json(analysis)
+            except (TypeError, ValueError) as e:
+                # Analyse utilisable mais non sérialisable: simplement non mise en cache
+                logger.warning(f"Analyse LLM non mise en cache ({content_hash}): {e}")
+            else:
+                self._llm_cache[content_hash] = analysis_json
+                self._pending_cache[content_hash] = analysis_json
+        return analysis
+
+    async def start_llm_batcher(self):
+        """Démarre le client HTTP Ollama persistant et la tâche de batching"""
+        if self._batcher_task is None:
+            self.llm_client = httpx.AsyncClient(
+                timeout=120,
+                limits=httpx.Limits(max_keepalive_connections=4)
+            )
+            self._llm_q = asyncio.Queue()
+            self._batcher_task = asyncio.create_task(self._llm_batcher())
+
+    async def stop_llm_batcher(self):
+        """Traite les annonces en attente puis arrête la tâche de batching"""
+        if self._batcher_task is not None:
+            await self._llm_q.put(None)
+            await self._batcher_task
+            await self.llm_client.aclose()
+            self._batcher_task = None
+            self._llm_q = None
+            self.llm_client = None
+
+    async def _llm_batcher(self):
+        """Regroupe jusqu'à `llm_max_batch` annonces (ou `llm_max_delay` secondes d'attente)
+        par requête Ollama"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            item = await self._llm_q.get()
+            if item is None:
+                break
+            
+            batch = [item]
+            deadline = loop.time() + self.llm_max_delay
+            while len(batch) < self.llm_max_batch:
+                try:
+                    item = await asyncio.wait_for(
+                        self._llm_q.get(), timeout=max(0.0, deadline - loop.time())
+                    )
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._analyze_batch(batch)
+
+    @staticmethod
+    def build_batch_prompt(excerpts: List[str]) -> str:
+        """Construit le prompt d'analyse d'un lot d'annonces"""
+        sections = "\n\n".join(
+            f"ANNONCE {i}:\n{excerpt}" for i, excerpt in enumerate(excerpts, 1)
+        )
+        return f"""
+        Analyse technique COMPLÈTE de chacune de ces {len(excerpts)} annonces de cryptomonnaie:
 
         CRITÈRES D'ANALYSE:
         1. INNOVATION RÉELLE (0-100): Nouveauté technique réelle vs marketing
@@ -196,63 +521,66 @@ class UltimateBitcointalkAnalyzer:
         6. MÉCANISMES UNIQUES: Features techniques originales
         7. RÉALISME: Faisabilité technique des propositions
 
-        CONTENU:
-        {content[:3000]}
-
-        RÉPONSE EN JSON STRICT:
-        {{
-            "innovation_score": 0-100,
-            "disruptiveness_score": 0-100,
-            "technical_score": 0-100,
-            "premine_analysis": "0% ou estimation",
-            "is_fork": true/false,
-            "fork_base": "nom projet ou null",
-            "mining_algorithm": "algo spécifique",
-            "consensus_mechanism": "PoW/PoS/DPoS/etc",
-            "unique_technical_features": ["liste"],
-            "technical_red_flags": ["liste"],
-            "technical_strengths": ["liste"],
-            "realism_assessment": "très réaliste/réaliste/optimiste/irréaliste"
-        }}
+        {sections}
+
+        RÉPONSE EN JSON STRICT, une analyse par annonce dans l'ordre des annonces:
+        {{"analyses": [
+            {{
+                "innovation_score": 0-100,
+                "disruptiveness_score": 0-100,
+                "technical_score": 0-100,
+                "premine_analysis": "0% ou estimation",
+                "is_fork": true/false,
+                "fork_base": "nom projet ou null",
+                "mining_algorithm": "algo spécifique",
+                "consensus_mechanism": "PoW/PoS/DPoS/etc",
+                "unique_technical_features": ["liste"],
+                "technical_red_flags": ["liste"],
+                "technical_strengths": ["liste"],
+                "realism_assessment": "très réaliste/réaliste/optimiste/irréaliste"
+            }}
+        ]}}
         """
+
+    async def _analyze_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Analyse un lot d'annonces en une seule requête Ollama"""
+        prompt = self.build_batch_prompt([excerpt for excerpt, _future in batch])
         
+        analyses = ()
         try:
-            response = ollama.chat(model='llama3.1', messages=[{
-                'role': 'user',
-                'content': prompt
-            }])
+            response = await self.llm_client.post(OLLAMA_CHAT_URL, json={
+                'model': OLLAMA_MODEL,
+                'format': 'json',
+                'stream': False,
+                'options': {'num_ctx': self.llm_num_ctx},
+                'messages': [{
+                    'role': 'user',
+                    'content': prompt
+                }]
+            })
+            response.raise_for_status()
+            analyses = parse_analyses(response.json()['message']['content'])
             
-            result_text = response['message']['content']
-            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-            
-            if json_match:
-                analysis = json.loads(json_match.group())
-                
-                # Nettoyage et validation des scores
-                for score_key in ['innovation_score', 'disruptiveness_score', 'technical_score']:
-                    if score_key in analysis:
-                        analysis[score_key] = max(0, min(100, int(analysis[score_key])))
-                
-                return analysis
+            # Sans correspondance exacte, impossible d'attribuer les analyses par position:
+            # aucune n'est retenue (ni mise en cache)
+            if len(analyses) != len(batch):
+                logger.warning(f"Ollama a renvoyé {len(analyses)} analyses pour {len(batch)} annonces, lot ignoré")
+                analyses = ()
                 
         except Exception as e:
             logger.error(f"Erreur analyse technique: {e}")
         
-        return {}
+        for i, (_excerpt, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(dict(analyses[i]) if i < len(analyses) else {})
 
-    def calculate_final_score(self, analysis: Dict, has_whitepaper: bool, has_github: bool) -> int:
+    def calculate_final_score(self, analysis: Dict, has_whitepaper: bool, has_github: bool,
+                              premine_pct: float) -> int:
         """Calcule un score final pondéré"""
-        weights = {
-            'innovation': 0.35,
-            'technical': 0.30,
-            'disruptiveness': 0.25,
-            'bonuses': 0.10
-        }
-        
         base_score = (
-            analysis.get('innovation_score', 0) * weights['innovation'] +
-            analysis.get('technical_score', 0) * weights['technical'] +
-            analysis.get('disruptiveness_score', 0) * weights['disruptiveness']
+            analysis.get('innovation_score', 0) * SCORE_WEIGHTS['innovation'] +
+            analysis.get('technical_score', 0) * SCORE_WEIGHTS['technical'] +
+            analysis.get('disruptiveness_score', 0) * SCORE_WEIGHTS['disruptiveness']
         )
         
         # Bonus/Malus
@@ -266,46 +594,35 @@ class UltimateBitcointalkAnalyzer:
             bonuses += 10
             
         # Malus pour premine élevé
-        premine_str = analysis.get('premine_analysis', '0%')
-        if '%' in premine_str:
-            try:
-                premine_pct = float(premine_str.replace('%', ''))
-                if premine_pct > 20:
-                    bonuses -= 25
-                elif premine_pct > 10:
-                    bonuses -= 15
-                elif premine_pct > 5:
-                    bonuses -= 5
-            except:
-                pass
+        if premine_pct > 20:
+            bonuses -= 25
+        elif premine_pct > 10:
+            bonuses -= 15
+        elif premine_pct > 5:
+            bonuses -= 5
         
         final_score = base_score + bonuses
         return max(0, min(100, int(final_score)))
 
     async def process_announcement(self, topic_id: int, url: str):
         """Traite une annonce complète"""
+        async with self._sem:
+            await self._process_announcement(topic_id, url)
+
+    async def _process_announcement(self, topic_id: int, url: str):
         try:
             logger.info(f"Traitement de l'annonce {topic_id}")
+            now_iso = datetime.now().isoformat()
             
-            # Récupération de la page
-            html = await self.fetch_with_retry(url)
+            # Récupération de la page (débit limité)
+            await self._limiter.acquire()
+            html = await self.fetch_bytes(url)
             if not html:
                 return
                 
-            # Extraction des données
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Titre
-            title_tag = soup.find('title')
-            title = title_tag.get_text().split(' | ')[0] if title_tag else "Titre inconnu"
-            
-            # Auteur
-            author_span = soup.find('span', id=re.compile(r'author_'))
-            author = author_span.get_text() if author_span else "Auteur inconnu"
-            
-            # Contenu
-            post_div = soup.find('div', class_='post')
-            content = post_div.get_text().strip() if post_div else ""
+            # Extraction des données (la page brute est libérée avant l'analyse LLM)
+            title, author, content = self.parse_announcement(html)
+            del html
             
             # Extraction des liens
             links = self.extract_links(content)
@@ -316,7 +633,8 @@ class UltimateBitcointalkAnalyzer:
             # Calcul du score final
             has_whitepaper = len(links['whitepaper']) > 0
             has_github = len(links['github']) > 0
-            final_score = self.calculate_final_score(technical_analysis, has_whitepaper, has_github)
+            premine_pct = parse_premine_percentage(technical_analysis.get('premine_analysis', '0%'))
+            final_score = self.calculate_final_score(technical_analysis, has_whitepaper, has_github, premine_pct)
             
             # Création de l'objet projet
             project = CryptoProject(
@@ -324,14 +642,14 @@ class UltimateBitcointalkAnalyzer:
                 title=title,
                 author=author,
                 content=content[:1000] + "..." if len(content) > 1000 else content,
-                post_date=datetime.now().isoformat(),
+                post_date=now_iso,
                 github_link=links['github'][0] if links['github'] else "",
                 whitepaper_link=links['whitepaper'][0] if links['whitepaper'] else "",
                 website_link=links['website'][0] if links['website'] else "",
                 technical_score=technical_analysis.get('technical_score', 0),
                 innovation_score=technical_analysis.get('innovation_score', 0),
                 disruptiveness_score=technical_analysis.get('disruptiveness_score', 0),
-                premine_percentage=float(technical_analysis.get('premine_analysis', '0%').replace('%', '')) if '%' in technical_analysis.get('premine_analysis', '0%') else 0.0,
+                premine_percentage=premine_pct,
                 is_fork=technical_analysis.get('is_fork', False),
                 fork_base=technical_analysis.get('fork_base', ''),
                 mining_algorithm=technical_analysis.get('mining_algorithm', ''),
@@ -340,11 +658,11 @@ class UltimateBitcointalkAnalyzer:
                 red_flags=technical_analysis.get('technical_red_flags', []),
                 strengths=technical_analysis.get('technical_strengths', []),
                 final_score=final_score,
-                analysis_date=datetime.now().isoformat()
+                analysis_date=now_iso
             )
             
             # Sauvegarde en base
-            self.save_project(project)
+            await self.save_project(project)
             self.analyzed_count += 1
             
             # Log des résultats prometteurs
@@ -354,112 +672,236 @@ class UltimateBitcointalkAnalyzer:
         except Exception as e:
             logger.error(f"Erreur traitement annonce {topic_id}: {e}")
 
-    def save_project(self, project: CryptoProject):
-        """Sauvegarde un projet en base de données"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def extract_topic_links(self, html: bytes) -> List[str]:
+        """Extrait les liens des nouveaux messages d'une page de liste"""
+        topic_links = [
+            html_lib.unescape(match.group(1).decode('latin-1'))
+            for match in LISTING_RE.finditer(html)
+        ]
+        if topic_links:
+            return topic_links
+        
+        # Aucun résultat: structure HTML différente (ou aucun nouveau message),
+        # repli sur un vrai parsing avec pré-filtrage CSS avant la regex
+        logger.debug("Aucun lien trouvé par LISTING_RE, repli sur selectolax")
+        tree = LexborHTMLParser(html)
+        for link in tree.css('a[href*="topic="]'):
+            href = link.attributes.get('href') or ''
+            classes = (link.attributes.get('class') or '').split()
+            if href and TOPIC_MSG_RE.search(href) and 'new' in classes:
+                topic_links.append(href)
+        return topic_links
+
+    def parse_announcement(self, html: bytes) -> Tuple[str, str, str]:
+        """Extrait le titre, l'auteur et le texte (tronqué) d'une page d'annonce"""
+        soup = BeautifulSoup(html, 'lxml', parse_only=ANNOUNCEMENT_STRAINER)
+        
+        # Titre
+        title_tag = soup.find('title')
+        title = title_tag.get_text().split(' | ')[0] if title_tag else "Titre inconnu"
+        
+        # Auteur
+        author_span = soup.find('span', id=AUTHOR_ID_RE)
+        author = author_span.get_text() if author_span else "Auteur inconnu"
+        
+        # Contenu
+        post_div = soup.find('div', class_='post')
+        content = post_div.get_text(" ", strip=True)[:POST_CONTENT_LIMIT] if post_div else ""
+        
+        return title, author, content
+
+    async def save_project(self, project: CryptoProject):
+        """Transmet un projet à la tâche d'écriture en base"""
+        self._analyzed_ids.add(project.topic_id)
+        await self._write_q.put(project)
+
+    async def start_writer(self):
+        """Démarre la tâche d'écriture en base en arrière-plan"""
+        if self._writer_task is None:
+            self._write_q = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer())
+
+    async def stop_writer(self):
+        """Vide la file d'écriture et arrête la tâche d'écriture"""
+        if self._writer_task is not None:
+            await self._write_q.put(None)
+            await self._writer_task
+            self._writer_task = None
+            self._write_q = None
+
+    async def _writer(self):
+        """Regroupe les projets reçus et les écrit hors de la boucle asyncio,
+        tous les `batch_size` projets ou toutes les `flush_interval` secondes"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        stopping = False
+        
+        while not stopping:
+            try:
+                project = await asyncio.wait_for(
+                    self._write_q.get(), timeout=max(0.0, deadline - loop.time())
+                )
+                if project is None:
+                    stopping = True
+                else:
+                    self._pending_projects.append(project)
+            except asyncio.TimeoutError:
+                pass
+            
+            if stopping or len(self._pending_projects) >= self.batch_size or loop.time() >= deadline:
+                await loop.run_in_executor(None, self._write_batch, *self._take_pending())
+                deadline = loop.time() + self.flush_interval
+
+    def _take_pending(self) -> Tuple[List[tuple], List[tuple]]:
+        """Récupère (et vide) les projets et analyses LLM en attente d'écriture"""
+        projects, self._pending_projects = self._pending_projects, []
+        last_updated = datetime.now().isoformat()
+        rows = []
+        for project in projects:
+            # Une conversion en échec ne doit ni tuer la tâche d'écriture ni perdre le lot
+            try:
+                rows.append(project_to_tuple(project, last_updated))
+            except Exception as e:
+                logger.error(f"Erreur conversion projet {project.topic_id}: {e}")
+        cache_rows, self._pending_cache = list(self._pending_cache.items()), {}
+        return rows, cache_rows
+
+    def _write_batch(self, rows: List[tuple], cache_rows: List[tuple]):
+        """Écrit un lot de projets et d'analyses LLM dans une seule transaction"""
+        if not rows and not cache_rows:
+            return
         
         try:
-            cursor.execute('''
-            INSERT OR REPLACE INTO projects 
-            (topic_id, title, author, post_date, content, technical_score, innovation_score,
-             disruptiveness_score, credibility_score, risk_score, premine_percentage, is_fork,
-             fork_base, mining_algorithm, consensus_mechanism, unique_features, red_flags,
-             strengths, final_score, github_link, whitepaper_link, website_link, analysis_date,
-             last_updated, is_promising)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                project.topic_id, project.title, project.author, project.post_date,
-                project.content, project.technical_score, project.innovation_score,
-                project.disruptiveness_score, project.credibility_score, project.risk_score,
-                project.premine_percentage, project.is_fork, project.fork_base,
-                project.mining_algorithm, project.consensus_mechanism,
-                json.dumps(project.unique_features), json.dumps(project.red_flags),
-                json.dumps(project.strengths), project.final_score, project.github_link,
-                project.whitepaper_link, project.website_link, project.analysis_date,
-                datetime.now().isoformat(), project.final_score >= 75
-            ))
+            self._conn.execute("BEGIN")
+            self._conn.executemany(INSERT_SQL, rows)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO llm_cache (content_hash, analysis_json) VALUES (?, ?)",
+                cache_rows
+            )
+            self._conn.execute("COMMIT")
+            logger.info(f"{len(rows)} projets sauvegardés")
             
-            conn.commit()
-            logger.info(f"Projet {project.topic_id} sauvegardé (Score: {project.final_score})")
+        except Exception as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            logger.error(f"Erreur sauvegarde projets: {e}, nouvel essai ligne par ligne")
+            self._write_rows_one_by_one(rows, cache_rows)
+
+    def _write_rows_one_by_one(self, rows: List[tuple], cache_rows: List[tuple]):
+        """Réécrit un lot en échec ligne par ligne: seule une ligne invalide est perdue"""
+        saved = 0
+        self._conn.execute("BEGIN")
+        try:
+            for row in rows:
+                try:
+                    self._conn.execute(INSERT_SQL, row)
+                    saved += 1
+                except sqlite3.Error as e:
+                    logger.error(f"Erreur sauvegarde projet {row[0]}: {e}")
+            for cache_row in cache_rows:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO llm_cache (content_hash, analysis_json) VALUES (?, ?)",
+                        cache_row
+                    )
+                except sqlite3.Error as e:
+                    logger.error(f"Erreur sauvegarde analyse en cache {cache_row[0]}: {e}")
+            self._conn.execute("COMMIT")
+            logger.info(f"{saved}/{len(rows)} projets sauvegardés")
             
         except Exception as e:
-            logger.error(f"Erreur sauvegarde projet: {e}")
-        finally:
-            conn.close()
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            logger.error(f"Erreur sauvegarde projets: {e}")
+
+    def flush_projects(self):
+        """Écrit immédiatement les données en attente (hors tâche d'écriture)"""
+        self._write_batch(*self._take_pending())
+
+    def close(self):
+        """Vide les écritures en attente et ferme la base de données"""
+        self.flush_projects()
+        self._conn.close()
 
     async def scan_bitcointalk_section(self, section_id: int = 159, pages: int = 2):
         """Scan une section de Bitcointalk"""
         await self.init_session()
+        await self.start_writer()
+        await self.start_llm_batcher()
         
+        seen = set()
         try:
             for page in range(pages):
                 url = f"{self.base_url}/index.php?board={section_id}.{page * 40}"
                 logger.info(f"Scan de la page {page + 1}/{pages}")
                 
-                html = await self.fetch_with_retry(url)
+                html = await self.fetch_bytes(url)
                 if not html:
                     continue
-                    
-                soup = BeautifulSoup(html, 'html.parser')
                 
-                # Recherche des liens des annonces
-                topic_links = []
-                for link in soup.find_all('a', href=re.compile(r'topic=\d+\.msg\d+')):
-                    href = link.get('href')
-                    if href and 'new' in link.get('class', []):
-                        topic_links.append(href)
+                topic_links = self.extract_topic_links(html)
                 
-                # Traitement des annonces
+                # Sélection des annonces non encore analysées (un seul lien par topic)
+                tasks = []
                 for topic_link in topic_links:
-                    topic_id = int(re.search(r'topic=(\d+)', topic_link).group(1))
-                    
-                    # Vérifier si déjà analysé
-                    if not self.is_project_analyzed(topic_id):
-                        full_url = f"{self.base_url}/{topic_link}" if topic_link.startswith('index.php') else topic_link
-                        await self.process_announcement(topic_id, full_url)
-                        await asyncio.sleep(1)  # Respect rate limiting
+                    topic_id = int(TOPIC_RE.search(topic_link).group(1))
+                
+                    # Vérifier si déjà vu pendant ce scan ou déjà analysé
+                    if topic_id in seen or self.is_project_analyzed(topic_id):
+                        continue
+                    seen.add(topic_id)
+                    full_url = f"{self.base_url}/{topic_link}" if topic_link.startswith('index.php') else topic_link
+                    tasks.append((topic_id, full_url))
                 
+                # Traitement concurrent (borné par le sémaphore et le limiteur de débit)
+                await asyncio.gather(
+                    *(self.process_announcement(topic_id, full_url) for topic_id, full_url in tasks),
+                    return_exceptions=True
+                )
         finally:
-            await self.close_session()
+            await self.stop_llm_batcher()
+            await self.stop_writer()
 
     def is_project_analyzed(self, topic_id: int) -> bool:
         """Vérifie si un projet a déjà été analysé"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM projects WHERE topic_id = ?", (topic_id,))
-        result = cursor.fetchone() is not None
-        conn.close()
-        return result
+        return topic_id in self._analyzed_ids
 
     def generate_report(self):
         """Génère un rapport des analyses"""
-        conn = sqlite3.connect(self.db_path)
+        self.flush_projects()
         
-        # Chargement des données
-        df = pd.read_sql_query("""
+        # Agrégats calculés directement par SQLite
+        total_projects, average_score, promising_projects = self._conn.execute("""
+            SELECT COUNT(*), COALESCE(AVG(final_score), 0), COALESCE(SUM(is_promising), 0)
+            FROM projects
+        """).fetchone()
+        
+        # Seuls les 10 meilleurs projets sont chargés
+        cursor = self._conn.execute("""
             SELECT topic_id, title, author, technical_score, innovation_score, 
                    disruptiveness_score, final_score, premine_percentage, is_fork,
                    mining_algorithm, consensus_mechanism, github_link,
                    analysis_date, is_promising
             FROM projects 
             ORDER BY final_score DESC
-        """, conn)
-        
-        conn.close()
+            LIMIT 10
+        """)
+        columns = [column[0] for column in cursor.description]
+        top_projects = [dict(zip(columns, row)) for row in cursor.fetchall()]
         
         # Génération du rapport
         report = {
-            'total_projects': len(df),
-            'promising_projects': len(df[df['is_promising'] == 1]),
-            'average_score': df['final_score'].mean(),
-            'top_projects': df.head(10).to_dict('records'),
+            'total_projects': total_projects,
+            'promising_projects': promising_projects,
+            'average_score': average_score,
+            'top_projects': top_projects,
             'analysis_date': datetime.now().isoformat()
         }
         
         # Sauvegarde du rapport
-        with open('crypto_analysis_report.json', 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        Path('crypto_analysis_report.json').write_bytes(
+            orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        )
             
         return report
 
@@ -500,6 +942,8 @@ async def main():
     except Exception as e:
         logger.error(f"Erreur lors de l'analyse: {e}")
     finally:
+        await analyzer.close_session()
+        analyzer.close()
         print("📁 Rapport sauvegardé: crypto_analysis_report.json")
         print("📊 Base de données: crypto_analysis.db")
 